@@ -1,5 +1,10 @@
-from typing import Any, List, Optional, Dict, Set
+from typing import Any, List, FrozenSet, Mapping, Optional, Dict, Tuple
+from array import array
+from collections import Counter, OrderedDict, defaultdict
 from enum import Enum
+from types import MappingProxyType
+import bisect
+import heapq
 import time
 import random
 
@@ -16,32 +21,146 @@ class TrackType(Enum):
     EXPRESS = "express"     # Express line
     LOOP = "loop"          # Loop line
 
+# Int tag per station type, cached on each station and in the frozen view
+ST_REGULAR = 0
+ST_JUNCTION = 1
+ST_TERMINAL = 2
+ST_EXPRESS = 3
+ST_TRANSFER = 4
+
+_STATION_TYPE_TAG = {
+    StationType.REGULAR: ST_REGULAR,
+    StationType.JUNCTION: ST_JUNCTION,
+    StationType.TERMINAL: ST_TERMINAL,
+    StationType.EXPRESS: ST_EXPRESS,
+    StationType.TRANSFER: ST_TRANSFER,
+}
+
+# Visualization symbol per station type tag, indexed by ST_*
+_STATION_SYMBOL = ("🚉", "🔀", "🔚", "⚡", "🔄")
+
+APSP_MAX_STATIONS = 256  # Cache full shortest-path trees per queried source up to this size
+ROUTE_CACHE_SIZE = 4096  # Max memoized (start, end) routes per network
+ACCESS_RING_SIZE = 8  # Recent access codes kept per station (power of two)
+ALT_LANDMARKS = 2  # Landmarks for the A* lower bound on large networks
+ALT_MIN_SEARCHES = 64  # Searches since the last mutation before landmarks are built
+
+# Edge kinds stored in the frozen CSR view
+EDGE_NEXT = 0       # Main/branch/loop continuation
+EDGE_EXPRESS = 1    # Express line continuation
+EDGE_SKIP = 2       # Express skip connection
+EDGE_BRANCH = 3     # Junction to branch connection
+EDGE_LOOP = 4       # Terminal loop connection
+EDGE_TRANSFER = 5   # Transfer connection (caller-supplied cost)
+
+# Cost per edge kind, indexed by EDGE_* (transfers carry their own cost)
+_EDGE_COST = (1.0, 0.5, 0.3, 1.0, 2.0)
+
+# Slot of each track type in a station's next_by_kind / prev_by_kind lists
+_TT_IDX = {
+    TrackType.MAIN: 0,
+    TrackType.BRANCH: 1,
+    TrackType.EXPRESS: 2,
+    TrackType.LOOP: 3,
+}
+_TRACK_TYPES = tuple(_TT_IDX)  # Slot -> TrackType
+
+# Edge kind for each next_by_kind slot
+_SLOT_EDGE_KIND = (EDGE_NEXT, EDGE_NEXT, EDGE_EXPRESS, EDGE_NEXT)
+
+# Global line color palette: color -> bit index, shared by all networks
+_COLOR_PALETTE = {}
+_PALETTE_COLORS = []  # Bit index -> color
+
+def _palette_bit(color: str) -> int:
+    """Bit for a line color, registering new colors on first sight"""
+    index = _COLOR_PALETTE.get(color)
+    if index is None:
+        index = _COLOR_PALETTE[color] = len(_PALETTE_COLORS)
+        _PALETTE_COLORS.append(color)
+    return 1 << index
+
 class SubwayStation:
     """Subway station-like data node"""
-    def __init__(self, station_id: str, data: Any, station_type: StationType = StationType.REGULAR):
+    __slots__ = ('station_id', 'data', '_station_type', '_type_tag',
+                 'next_by_kind', 'prev_by_kind', 'branch_connections',
+                 'express_skip_to', 'transfer_destinations',
+                 'line_colors_mask', 'passenger_capacity', 'is_active', 'ord_idx')
+    
+    # Profiling fields live on ProfiledStation; plain stations read these defaults
+    access_frequency = 0
+    last_accessed = None
+    
+    def __init__(self, station_id: str, data: Any, station_type: StationType = StationType.REGULAR,
+                 ord_idx: int = -1):
         self.station_id = station_id
         self.data = data
         self.station_type = station_type
         
         # Subway connections - Metro-like connections
-        self.next_stations = {}  # track_type -> next_station
-        self.prev_stations = {}  # track_type -> prev_station
+        self.next_by_kind = [None] * len(_TT_IDX)  # _TT_IDX slot -> next_station
+        self.prev_by_kind = [None] * len(_TT_IDX)  # _TT_IDX slot -> prev_station
         self.branch_connections = []  # Branch line connections
         self.express_skip_to = None  # Express skip connection
         self.transfer_destinations = []  # Transfer destinations
         
         # Metro-specific properties
-        self.line_colors = set()  # Lines passing through this station
+        self.line_colors_mask = 0  # Palette bits of lines passing through this station
         self.passenger_capacity = 1  # How much data it can hold
-        self.access_frequency = 0  # How often it's accessed
         self.is_active = True
+        self.ord_idx = ord_idx  # Dense index assigned by the owning network
+    
+    @property
+    def station_type(self) -> StationType:
+        """Station type; assigning it also refreshes the cached int tag"""
+        return self._station_type
+    
+    @station_type.setter
+    def station_type(self, station_type: StationType):
+        # Keep the int tag in step so hot loops compare ints, not Enum members
+        self._station_type = station_type
+        self._type_tag = _STATION_TYPE_TAG[station_type]
+    
+    @property
+    def line_colors(self) -> FrozenSet[str]:
+        """Colors of lines passing through this station, decoded from the mask (read-only)"""
+        colors = []
+        mask = self.line_colors_mask
+        while mask:
+            low_bit = mask & -mask
+            colors.append(_PALETTE_COLORS[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return frozenset(colors)
+    
+    @property
+    def next_stations(self) -> Mapping[TrackType, 'SubwayStation']:
+        """Read-only track_type -> next_station view of next_by_kind; writes raise TypeError"""
+        return MappingProxyType({track_type: station for track_type, station
+                                 in zip(_TRACK_TYPES, self.next_by_kind) if station is not None})
+    
+    @property
+    def prev_stations(self) -> Mapping[TrackType, 'SubwayStation']:
+        """Read-only track_type -> prev_station view of prev_by_kind; writes raise TypeError"""
+        return MappingProxyType({track_type: station for track_type, station
+                                 in zip(_TRACK_TYPES, self.prev_by_kind) if station is not None})
+
+class ProfiledStation(SubwayStation):
+    """Station that also stores access tracking fields, used by profiling networks"""
+    __slots__ = ('access_frequency', 'last_accessed')
+    
+    def __init__(self, station_id: str, data: Any, station_type: StationType = StationType.REGULAR,
+                 ord_idx: int = -1):
+        super().__init__(station_id, data, station_type, ord_idx)
         
         # Performance tracking
+        self.access_frequency = 0  # How often it's accessed
         self.last_accessed = None
-        self.access_pattern = []  # Recent access types
 
 class SubwayTrack:
     """Subway line-like data pathway"""
+    __slots__ = ('track_id', 'track_type', 'color', 'stations',
+                 'is_bidirectional', 'express_stops', 'capacity', '_station_ords')
+    
     def __init__(self, track_id: str, track_type: TrackType, color: str):
         self.track_id = track_id
         self.track_type = track_type
@@ -50,6 +169,156 @@ class SubwayTrack:
         self.is_bidirectional = True
         self.express_stops = set()  # Stations where express stops
         self.capacity = float('inf')  # Track capacity
+        self._station_ords = None  # ord_idx of each station, set by SubwayNetwork.finalize()
+
+_UNHASHABLE = object()  # Heads identity keys, so they can never equal real station data
+
+def _data_key(data: Any):
+    """Index key for station data: the value itself, or its identity if unhashable"""
+    try:
+        hash(data)
+    except TypeError:
+        return (_UNHASHABLE, id(data))
+    return data
+
+def _reconstruct_path(parents, goal: int) -> List[int]:
+    """Walk parent pointers back from goal to start (-1 marks the start)"""
+    path = []
+    node = goal
+    while node != -1:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+def _dijkstra_csr(indptr, indices, weights, src: int, dst: int, n: int) -> Tuple[List[float], List[int]]:
+    """Dijkstra over flat CSR arrays, returns (best costs, parents); stops once dst >= 0 is settled"""
+    inf = float('inf')
+    best = [inf] * n  # Ordinal-indexed, doubles as the settled check
+    parents = [-1] * n
+    best[src] = 0.0
+    goal_cost = inf  # Best known cost to dst, prunes pushes that cannot beat it
+    counter = 0  # Tie-breaker keeps equal-cost pops in push order
+    frontier = [(0.0, counter, src)]
+    heappush, heappop = heapq.heappush, heapq.heappop  # Skip the module lookup per edge
+    
+    while frontier:
+        cost, _, u = heappop(frontier)
+        if cost > best[u]:
+            continue  # Stale entry, u was already settled cheaper
+        
+        if u == dst:
+            break  # Popping the goal is optimal with non-negative costs
+        
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            next_cost = cost + weights[e]
+            if next_cost >= goal_cost:
+                continue
+            if next_cost < best[v]:
+                best[v] = next_cost
+                parents[v] = u
+                if v == dst:
+                    goal_cost = next_cost
+                counter += 1
+                heappush(frontier, (next_cost, counter, v))
+    
+    return best, parents
+
+def _reverse_csr(indptr, indices, weights, n: int) -> Tuple[array, List[int], List[float]]:
+    """Transpose CSR arrays so each row lists incoming edges"""
+    rev_indptr = array('i', [0]) * (n + 1)
+    for v in indices:
+        rev_indptr[v + 1] += 1
+    for u in range(n):
+        rev_indptr[u + 1] += rev_indptr[u]
+    
+    fill = list(rev_indptr[:n])
+    rev_indices = [0] * len(indices)
+    rev_weights = [0.0] * len(indices)
+    for u in range(n):
+        for e in range(indptr[u], indptr[u + 1]):
+            slot = fill[indices[e]]
+            rev_indices[slot] = u
+            rev_weights[slot] = weights[e]
+            fill[indices[e]] = slot + 1
+    return rev_indptr, rev_indices, rev_weights
+
+def _select_landmarks(indptr, indices, weights, n: int, count: int) -> List[Tuple[List[float], List[float]]]:
+    """Greedy farthest-point landmarks, as (cost from landmark, cost to landmark) lists"""
+    rev_indptr, rev_indices, rev_weights = _reverse_csr(indptr, indices, weights, n)
+    inf = float('inf')
+    nearest = [inf] * n  # Cost from the closest landmark picked so far
+    landmarks = []
+    landmark = 0
+    
+    for _ in range(min(count, n)):
+        from_l = _dijkstra_csr(indptr, indices, weights, landmark, -1, n)[0]
+        to_l = _dijkstra_csr(rev_indptr, rev_indices, rev_weights, landmark, -1, n)[0]
+        landmarks.append((from_l, to_l))
+        
+        for v in range(n):
+            if from_l[v] < nearest[v]:
+                nearest[v] = from_l[v]
+        # Next landmark: farthest reachable station, else one no landmark reaches yet
+        farthest, landmark = 0.0, -1
+        for v in range(n):
+            if nearest[v] == inf:
+                landmark = v
+                break
+            if nearest[v] > farthest:
+                farthest, landmark = nearest[v], v
+        if landmark == -1:
+            break
+    
+    return landmarks
+
+def _astar_csr(indptr, indices, weights, src: int, dst: int, n: int,
+               landmarks) -> Tuple[List[float], List[int]]:
+    """A* over flat CSR arrays with a landmark (ALT) lower bound, returns (best costs, parents)"""
+    inf = float('inf')
+    # Triangle inequality bounds, skipping landmarks that cannot reach or be reached
+    bounds = [(from_l, from_l[dst], to_l, to_l[dst]) for from_l, to_l in landmarks]
+    
+    def lower_bound(v):
+        h = 0.0
+        for from_l, from_dst, to_l, to_dst in bounds:
+            if from_dst < inf and from_l[v] < inf and from_dst - from_l[v] > h:
+                h = from_dst - from_l[v]
+            if to_l[v] < inf and to_dst < inf and to_l[v] - to_dst > h:
+                h = to_l[v] - to_dst
+        return h
+    
+    best = [inf] * n
+    parents = [-1] * n
+    best[src] = 0.0
+    goal_cost = inf
+    counter = 0
+    frontier = [(lower_bound(src), counter, 0.0, src)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+    
+    while frontier:
+        _, _, cost, u = heappop(frontier)
+        if cost > best[u]:
+            continue
+        
+        if u == dst:
+            break
+        
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            next_cost = cost + weights[e]
+            if next_cost >= goal_cost:
+                continue
+            if next_cost < best[v]:
+                best[v] = next_cost
+                parents[v] = u
+                if v == dst:
+                    goal_cost = next_cost
+                counter += 1
+                heappush(frontier, (next_cost + lower_bound(v), counter, next_cost, v))
+    
+    return best, parents
 
 class SubwayNetwork:
     """
@@ -63,39 +332,168 @@ class SubwayNetwork:
     5. Special structure for terminal loops
     """
     
-    def __init__(self):
+    def __init__(self, profiling: bool = False):
         self.stations = {}  # station_id -> SubwayStation
+        self.profiling = profiling  # Track per-station access fields on ProfiledStation
+        self._station_cls = ProfiledStation if profiling else SubwayStation
         self.tracks = {}    # track_id -> SubwayTrack
         self.junctions = {}  # junction_id -> set of connected tracks
         self.network_map = {}  # Network topology
+        self._data_index = {}  # data key -> stations holding it, in self.stations order
+        self._id_pos = {}  # station_id -> slot in self.stations, kept when the id is reused
+        self._csr = None  # Frozen (indptr, neighbors, costs, kinds), rebuilt after mutations
+        self._csr_lists = None  # List copies of (indptr, neighbors, costs) for the kernels
+        self._stations_list = []  # ord_idx -> SubwayStation, in creation order
+        self._station_ids = []  # ord_idx -> station_id, parallel to _stations_list
+        self._sp_trees = {}  # src ord_idx -> shortest-path-tree parents, small networks only
+        self._landmarks = None  # ALT (cost from, cost to) lists per landmark, large networks only
+        self._searches_since_change = 0  # Single-destination searches on the current topology
+        self._track_load_heap = []  # (station count, slot, generation, track_id) for main/branch tracks
+        self._track_slot = {}  # track_id -> slot in self.tracks, breaks load ties like the old dict scan
+        self._track_gen = {}  # track_id -> generation of its live heap entry, older entries are stale
+        self._route_cache = OrderedDict()  # (start ord_idx, end ord_idx) -> route tuple, LRU order
+        self._type_counts = [0] * len(_STATION_TYPE_TAG)  # ST_* tag -> station count
+        self._track_type_counts = Counter()  # track_type.value -> track count
+        self._connection_total = 0  # Linked next/prev slots + branch + transfer entries
+        self._retired = set()  # ord_idx of stations whose station_id was reused, excluded from counts
+        self._access_ring = bytearray()  # ACCESS_RING_SIZE access codes per station
+        self._access_head = array('Q')  # ord_idx -> total accesses logged
         
         # Performance metrics
         self.total_data_items = 0
         self.average_path_length = 0
-        self.cache_efficiency = 0
+        self.cache_efficiency = 0  # Route cache hit ratio
+        self._route_hits = 0
+        self._route_lookups = 0
         
+    def _invalidate_routing(self):
+        """Drop the frozen view and memoized routes after a topology change"""
+        self._csr = None
+        self._csr_lists = None
+        self._sp_trees.clear()
+        self._landmarks = None
+        self._searches_since_change = 0
+        self._route_cache.clear()
+    
+    def _new_station(self, station_id: str, data: Any,
+                     station_type: StationType = StationType.REGULAR) -> SubwayStation:
+        """Create a station with the next dense ordinal and register it"""
+        old_station = self.stations.get(station_id)
+        if old_station is not None:
+            self._retire_station(old_station)
+        
+        station = self._station_cls(station_id, data, station_type, len(self._stations_list))
+        self._type_counts[station._type_tag] += 1
+        self._stations_list.append(station)
+        self._station_ids.append(station_id)
+        self._grow_access_ring(1)
+        self.stations[station_id] = station
+        self._index_station(station)
+        return station
+    
+    def _new_stations(self, id_prefix: str, start: int, data_items: List[Any],
+                      color_bit: int) -> List[SubwayStation]:
+        """Create regular stations id_prefix + str(start + i) and register them in bulk"""
+        first_ord = len(self._stations_list) - start
+        station_cls = self._station_cls
+        stations = [station_cls(id_prefix + str(i), data, StationType.REGULAR, first_ord + i)
+                    for i, data in enumerate(data_items, start)]
+        stations_map = self.stations
+        for station in stations:
+            station.line_colors_mask = color_bit
+            if station.station_id in stations_map:
+                self._retire_station(stations_map[station.station_id])
+        
+        self._type_counts[ST_REGULAR] += len(stations)
+        self._stations_list.extend(stations)
+        self._station_ids.extend([station.station_id for station in stations])
+        self._grow_access_ring(len(stations))
+        self.stations.update([(station.station_id, station) for station in stations])
+        for station in stations:
+            self._index_station(station)
+        return stations
+    
+    def _index_station(self, station: SubwayStation):
+        """Add a station to its data bucket, ordered like a scan over self.stations"""
+        id_pos = self._id_pos
+        pos = id_pos.setdefault(station.station_id, len(id_pos))
+        bucket = self._data_index.setdefault(_data_key(station.data), [])
+        if not bucket or id_pos[bucket[-1].station_id] < pos:
+            bucket.append(station)
+        else:
+            # A reused station_id keeps its original dict slot, so it can sort earlier
+            bisect.insort(bucket, station, key=lambda held: id_pos[held.station_id])
+    
+    def _grow_access_ring(self, count: int):
+        """Reserve ring buffer space for count newly assigned ordinals"""
+        # Stations are never removed, so ordinals are stable and the ring only grows
+        self._access_ring.extend(bytes(count * ACCESS_RING_SIZE))
+        self._access_head.extend([0] * count)
+    
+    def _retire_station(self, station: SubwayStation):
+        """Drop a station replaced by a new one with the same station_id from counters and index"""
+        # It stays in _stations_list so ordinals remain stable for the CSR view
+        self._retired.add(station.ord_idx)
+        holders = self._data_index.get(_data_key(station.data))
+        if holders is not None:
+            holders.remove(station)
+            if not holders:
+                del self._data_index[_data_key(station.data)]
+        self._type_counts[station._type_tag] -= 1
+        self._connection_total -= (len(station.next_by_kind) - station.next_by_kind.count(None) +
+                                   len(station.prev_by_kind) - station.prev_by_kind.count(None) +
+                                   len(station.branch_connections) +
+                                   len(station.transfer_destinations))
+    
+    def _set_station_type(self, station: SubwayStation, station_type: StationType):
+        """Change a station's type, keeping the per-type counts in step"""
+        if station.ord_idx in self._retired:
+            station.station_type = station_type
+            return
+        self._type_counts[station._type_tag] -= 1
+        station.station_type = station_type
+        self._type_counts[station._type_tag] += 1
+    
+    def _link(self, prev_station: SubwayStation, station: SubwayStation, kind_idx: int):
+        """Link prev_station -> station in one next/prev slot, counting newly filled slots"""
+        filled_next = prev_station.next_by_kind[kind_idx] is None
+        filled_prev = station.prev_by_kind[kind_idx] is None
+        if self._retired:
+            filled_next = filled_next and prev_station.ord_idx not in self._retired
+            filled_prev = filled_prev and station.ord_idx not in self._retired
+        self._connection_total += filled_next + filled_prev
+        prev_station.next_by_kind[kind_idx] = station
+        station.prev_by_kind[kind_idx] = prev_station
+    
+    def _register_track(self, track: SubwayTrack):
+        """Add or replace a track by id, keeping the per-type counts in step"""
+        old_track = self.tracks.get(track.track_id)
+        if old_track is not None:
+            self._track_type_counts[old_track.track_type.value] -= 1
+        # A reused track_id keeps its original dict slot
+        self._track_slot.setdefault(track.track_id, len(self._track_slot))
+        self.tracks[track.track_id] = track
+        self._track_type_counts[track.track_type.value] += 1
+    
     def create_main_line(self, line_id: str, stations_data: List[Any], color: str = "blue"):
         """Create main line (linear linked list-like)"""
         track = SubwayTrack(line_id, TrackType.MAIN, color)
+        color_bit = _palette_bit(color)
+        kind_idx = _TT_IDX[TrackType.MAIN]
         
-        prev_station = None
-        for i, data in enumerate(stations_data):
-            station_id = f"{line_id}_station_{i}"
-            station_type = StationType.TERMINAL if (i == 0 or i == len(stations_data)-1) else StationType.REGULAR
-            
-            station = SubwayStation(station_id, data, station_type)
-            station.line_colors.add(color)
-            
-            # Setup linear connections
-            if prev_station:
-                station.prev_stations[TrackType.MAIN] = prev_station
-                prev_station.next_stations[TrackType.MAIN] = station
-            
-            self.stations[station_id] = station
-            track.stations.append(station)
-            prev_station = station
+        stations = self._new_stations(f"{line_id}_station_", 0, stations_data, color_bit)
+        if stations:
+            self._set_station_type(stations[0], StationType.TERMINAL)
+            self._set_station_type(stations[-1], StationType.TERMINAL)
+        
+        # Setup linear connections
+        for prev_station, station in zip(stations, stations[1:]):
+            self._link(prev_station, station, kind_idx)
         
-        self.tracks[line_id] = track
+        track.stations = stations
+        self._register_track(track)
+        self._push_track_load(track)
+        self._invalidate_routing()
         self.total_data_items += len(stations_data)
         
         return track
@@ -107,31 +505,29 @@ class SubwayNetwork:
             raise ValueError(f"Junction station {junction_station_id} not found")
         
         junction_station = self.stations[junction_station_id]
-        junction_station.station_type = StationType.JUNCTION
+        self._set_station_type(junction_station, StationType.JUNCTION)
         
         track = SubwayTrack(branch_id, TrackType.BRANCH, color)
+        color_bit = _palette_bit(color)
+        kind_idx = _TT_IDX[TrackType.BRANCH]
         
-        prev_station = junction_station
-        for i, data in enumerate(branch_data):
-            station_id = f"{branch_id}_station_{i}"
-            station_type = StationType.TERMINAL if i == len(branch_data)-1 else StationType.REGULAR
-            
-            station = SubwayStation(station_id, data, station_type)
-            station.line_colors.add(color)
-            
-            # Branch connection
-            station.prev_stations[TrackType.BRANCH] = prev_station
-            prev_station.next_stations[TrackType.BRANCH] = station
-            
+        stations = self._new_stations(f"{branch_id}_station_", 0, branch_data, color_bit)
+        if stations:
+            self._set_station_type(stations[-1], StationType.TERMINAL)
             # Junction to branch connection
-            if i == 0:  # First branch station
-                junction_station.branch_connections.append(station)
-            
-            self.stations[station_id] = station
-            track.stations.append(station)
-            prev_station = station
+            junction_station.branch_connections.append(stations[0])
+            if junction_station.ord_idx not in self._retired:
+                # Re-creating a branch from one of its own stations retires that junction
+                self._connection_total += 1
         
-        self.tracks[branch_id] = track
+        # Branch connections, starting from the junction
+        for prev_station, station in zip([junction_station] + stations, stations):
+            self._link(prev_station, station, kind_idx)
+        
+        track.stations = stations
+        self._register_track(track)
+        self._push_track_load(track)
+        self._invalidate_routing()
         self.total_data_items += len(branch_data)
         
         return track
@@ -144,6 +540,8 @@ class SubwayNetwork:
         
         main_track = self.tracks[main_line_id]
         express_track = SubwayTrack(express_id, TrackType.EXPRESS, color)
+        color_bit = _palette_bit(color)
+        kind_idx = _TT_IDX[TrackType.EXPRESS]
         
         prev_express_station = None
         for station_index in express_stations:
@@ -151,20 +549,20 @@ class SubwayNetwork:
                 continue
                 
             station = main_track.stations[station_index]
-            station.station_type = StationType.EXPRESS
-            station.line_colors.add(color)
+            self._set_station_type(station, StationType.EXPRESS)
+            station.line_colors_mask |= color_bit
             
             # Express connections
             if prev_express_station:
-                station.prev_stations[TrackType.EXPRESS] = prev_express_station
-                prev_express_station.next_stations[TrackType.EXPRESS] = station
+                self._link(prev_express_station, station, kind_idx)
                 prev_express_station.express_skip_to = station
             
             express_track.stations.append(station)
             express_track.express_stops.add(station.station_id)
             prev_express_station = station
         
-        self.tracks[express_id] = express_track
+        self._register_track(express_track)
+        self._invalidate_routing()
         return express_track
     
     def create_loop_connection(self, start_station_id: str, end_station_id: str, 
@@ -180,28 +578,35 @@ class SubwayNetwork:
         loop_track = SubwayTrack(loop_id, TrackType.LOOP, color)
         
         # U-shape connection
-        start_station.next_stations[TrackType.LOOP] = end_station
-        end_station.prev_stations[TrackType.LOOP] = start_station
+        self._link(start_station, end_station, _TT_IDX[TrackType.LOOP])
         
-        start_station.line_colors.add(color)
-        end_station.line_colors.add(color)
+        color_bit = _palette_bit(color)
+        start_station.line_colors_mask |= color_bit
+        end_station.line_colors_mask |= color_bit
         
         loop_track.stations = [start_station, end_station]
-        self.tracks[loop_id] = loop_track
+        self._register_track(loop_track)
+        self._invalidate_routing()
         
         return loop_track
     
     def add_transfer_connection(self, station1_id: str, station2_id: str, transfer_cost: int = 1):
         """Add transfer connection between two stations"""
+        if transfer_cost < 0:
+            # Route search assumes non-negative edge costs
+            raise ValueError(f"Transfer cost must be non-negative, got {transfer_cost}")
+        
         station1 = self.stations.get(station1_id)
         station2 = self.stations.get(station2_id)
         
         if station1 and station2:
             station1.transfer_destinations.append((station2, transfer_cost))
             station2.transfer_destinations.append((station1, transfer_cost))
+            self._connection_total += 2
             
-            station1.station_type = StationType.TRANSFER
-            station2.station_type = StationType.TRANSFER
+            self._set_station_type(station1, StationType.TRANSFER)
+            self._set_station_type(station2, StationType.TRANSFER)
+            self._invalidate_routing()
     
     def find_optimal_route(self, start_data: Any, end_data: Any) -> List[str]:
         """Metro routing-like optimal pathfinding"""
@@ -211,69 +616,216 @@ class SubwayNetwork:
         if not (start_station and end_station):
             return []
         
-        # Subway-specific pathfinding
-        visited = set()
-        queue = [(start_station, [start_station.station_id], 0)]  # station, path, cost
+        key = (start_station.ord_idx, end_station.ord_idx)
+        route = self._cached_route(key)
+        if route is not None:
+            return list(route)
         
-        while queue:
-            current, path, cost = queue.pop(0)
-            
-            if current.station_id in visited:
+        src, dst = key
+        return list(self._store_route(src, dst, self._shortest_path_tree(src, dst)))
+    
+    def find_routes_batch(self, pairs: List[Tuple[Any, Any]]) -> List[List[str]]:
+        """Optimal routes for many (start_data, end_data) pairs, one search per start station"""
+        routes = [[] for _ in pairs]
+        groups = defaultdict(list)  # start ord_idx -> [(position in pairs, end ord_idx)]
+        
+        for position, (start_data, end_data) in enumerate(pairs):
+            start_station = self._find_station_by_data(start_data)
+            end_station = self._find_station_by_data(end_data)
+            if not (start_station and end_station):
                 continue
-            visited.add(current.station_id)
-            
-            if current == end_station:
-                return path
             
-            # Metro-like navigation options
-            next_options = []
-            
-            # 1. Continue on Main/Branch line
-            for track_type, next_station in current.next_stations.items():
-                if next_station and next_station.station_id not in visited:
-                    next_cost = cost + 1
-                    if track_type == TrackType.EXPRESS:
-                        next_cost = cost + 0.5  # Express is faster
-                    next_options.append((next_station, path + [next_station.station_id], next_cost))
+            key = (start_station.ord_idx, end_station.ord_idx)
+            route = self._cached_route(key)
+            if route is not None:
+                routes[position] = list(route)
+            else:
+                groups[key[0]].append((position, key[1]))
+        
+        for src, targets in groups.items():
+            # A lone destination keeps the early exit; several share one full tree
+            destinations = {dst for _, dst in targets}
+            dst = destinations.pop() if len(destinations) == 1 else -1
+            parents = self._shortest_path_tree(src, dst)
+            for position, dst in targets:
+                routes[position] = list(self._store_route(src, dst, parents))
+        
+        return routes
+    
+    def _cached_route(self, key: Tuple[int, int]) -> Optional[Tuple[str, ...]]:
+        """Memoized route for (start ord_idx, end ord_idx), updating cache_efficiency"""
+        self._route_lookups += 1
+        route = self._route_cache.get(key)
+        if route is not None:
+            self._route_cache.move_to_end(key)
+            self._route_hits += 1
+        self.cache_efficiency = self._route_hits / self._route_lookups
+        return route
+    
+    def _shortest_path_tree(self, src: int, dst: int = -1):
+        """Parent pointers from src, full tree or a search stopped once dst >= 0 is settled"""
+        n = len(self._stations_list)
+        if n <= APSP_MAX_STATIONS:
+            # Only sources actually queried pay for a tree, once per topology
+            parents = self._sp_trees.get(src)
+            if parents is None:
+                indptr, neighbors, costs = self._routing_lists()
+                parents = self._sp_trees[src] = array('i', _dijkstra_csr(indptr, neighbors, costs,
+                                                                         src, -1, n)[1])
+            return parents
+        
+        indptr, neighbors, costs = self._routing_lists()
+        if dst < 0:
+            return _dijkstra_csr(indptr, neighbors, costs, src, dst, n)[1]
+        
+        if self._landmarks is None:
+            # Landmarks cost several full searches; only build them once a static topology has
+            # served enough queries to repay that, plain early-exit Dijkstra until then
+            self._searches_since_change += 1
+            if self._searches_since_change < ALT_MIN_SEARCHES:
+                return _dijkstra_csr(indptr, neighbors, costs, src, dst, n)[1]
+            self._landmarks = _select_landmarks(indptr, neighbors, costs, n, ALT_LANDMARKS)
+        return _astar_csr(indptr, neighbors, costs, src, dst, n, self._landmarks)[1]
+    
+    def _store_route(self, src: int, dst: int, parents) -> Tuple[str, ...]:
+        """Route from a parent tree as station_ids, memoized in the LRU cache"""
+        if src == dst or parents[dst] != -1:
+            station_ids = self._station_ids
+            route = tuple([station_ids[i] for i in _reconstruct_path(parents, dst)])
+        else:
+            route = ()
+        
+        self._route_cache[(src, dst)] = route
+        if len(self._route_cache) > ROUTE_CACHE_SIZE:
+            self._route_cache.popitem(last=False)
+        return route
+    
+    def finalize(self):
+        """Freeze routing view and make track station lists read-only tuples"""
+        self.freeze()
+        for track in self.tracks.values():
+            track.stations = tuple(track.stations)
+            track._station_ords = array('i', (station.ord_idx for station in track.stations))
+    
+    def _routing_lists(self) -> Tuple[List[int], List[int], List[float]]:
+        """CSR (indptr, neighbors, costs) as lists, which index faster than arrays in the kernels"""
+        if self._csr_lists is None:
+            indptr, neighbors, costs, _ = self.freeze()
+            self._csr_lists = (indptr.tolist(), neighbors.tolist(), costs.tolist())
+        return self._csr_lists
+    
+    def freeze(self) -> Tuple[array, array, array, array]:
+        """Freeze topology into CSR arrays (indptr, neighbors, costs, kinds)"""
+        if self._csr is not None:
+            return self._csr
+        
+        indptr = array('i', [0])
+        neighbors = array('i')
+        costs = array('d')
+        kinds = array('b')
+        
+        def add_edge(station, kind, cost=None):
+            neighbors.append(station.ord_idx)
+            costs.append(_EDGE_COST[kind] if cost is None else cost)
+            kinds.append(kind)
+        
+        loop_idx = _TT_IDX[TrackType.LOOP]
+        for station in self._stations_list:
+            # 1. Continue on Main/Branch line (express is faster)
+            for kind_idx, next_station in enumerate(station.next_by_kind):
+                if next_station is not None:
+                    add_edge(next_station, _SLOT_EDGE_KIND[kind_idx])
             
-            # 2. Use express skip
-            if current.express_skip_to and current.express_skip_to.station_id not in visited:
-                next_options.append((current.express_skip_to, 
-                                   path + [current.express_skip_to.station_id], cost + 0.3))
+            # 2. Express skip
+            if station.express_skip_to:
+                add_edge(station.express_skip_to, EDGE_SKIP)
             
             # 3. Branch connections
-            for branch_station in current.branch_connections:
-                if branch_station.station_id not in visited:
-                    next_options.append((branch_station, 
-                                       path + [branch_station.station_id], cost + 1))
+            for branch_station in station.branch_connections:
+                add_edge(branch_station, EDGE_BRANCH)
             
             # 4. Transfer connections
-            for transfer_station, transfer_cost in current.transfer_destinations:
-                if transfer_station.station_id not in visited:
-                    next_options.append((transfer_station, 
-                                       path + [transfer_station.station_id], 
-                                       cost + transfer_cost))
+            for transfer_station, transfer_cost in station.transfer_destinations:
+                add_edge(transfer_station, EDGE_TRANSFER, float(transfer_cost))
             
             # 5. Loop connections
-            if TrackType.LOOP in current.next_stations:
-                loop_station = current.next_stations[TrackType.LOOP]
-                if loop_station and loop_station.station_id not in visited:
-                    next_options.append((loop_station, 
-                                       path + [loop_station.station_id], cost + 2))
+            loop_station = station.next_by_kind[loop_idx]
+            if loop_station:
+                add_edge(loop_station, EDGE_LOOP)
             
-            # Sort by cost (greedy approach)
-            next_options.sort(key=lambda x: x[2])
-            queue.extend(next_options)
+            indptr.append(len(neighbors))
         
-        return []  # No path found
+        self._csr = (indptr, neighbors, costs, kinds)
+        return self._csr
+    
+    def record_access(self, station_id: str, access_code: int):
+        """Log an access code (0-255) in the station's ring buffer, and count it when profiling"""
+        station = self.stations[station_id]
+        if self.profiling:
+            station.access_frequency += 1
+            station.last_accessed = time.time()
+        
+        idx = station.ord_idx
+        head = self._access_head[idx]
+        self._access_ring[idx * ACCESS_RING_SIZE + (head & (ACCESS_RING_SIZE - 1))] = access_code
+        self._access_head[idx] = head + 1
+    
+    def get_access_pattern(self, station_id: str) -> List[int]:
+        """Recent access codes for a station, oldest first"""
+        idx = self.stations[station_id].ord_idx
+        head = self._access_head[idx]
+        count = min(head, ACCESS_RING_SIZE)
+        base = idx * ACCESS_RING_SIZE
+        return [self._access_ring[base + ((head - count + k) & (ACCESS_RING_SIZE - 1))]
+                for k in range(count)]
     
     def _find_station_by_data(self, data: Any) -> Optional[SubwayStation]:
-        """Find station by data content"""
-        for station in self.stations.values():
-            if station.data == data:
+        """Find the first active station holding this data"""
+        for station in self._data_index.get(_data_key(data), ()):
+            if station.is_active:
                 return station
         return None
     
+    def _push_track_load(self, track: SubwayTrack):
+        """Register a main/branch track in the load heap, superseding any entry for its id"""
+        generation = self._track_gen.get(track.track_id, -1) + 1
+        self._track_gen[track.track_id] = generation
+        heap = self._track_load_heap
+        if len(heap) >= 2 * len(self._track_gen):
+            # Superseded entries only pop once they surface, so compact before they pile up
+            heap[:] = [entry for entry in heap if entry[2] == self._track_gen[entry[3]]]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (len(track.stations), self._track_slot[track.track_id],
+                              generation, track.track_id))
+    
+    def _least_busy_track(self) -> Optional[SubwayTrack]:
+        """Find least busy main/branch line, lazily refreshing stale heap entries"""
+        heap = self._track_load_heap
+        while heap:
+            load, slot, generation, track_id = heap[0]
+            track = self.tracks.get(track_id)
+            if (track is None or track.track_type not in (TrackType.MAIN, TrackType.BRANCH) or
+                    generation != self._track_gen[track_id]):
+                heapq.heappop(heap)  # Removed, retyped or re-created since this entry was pushed
+                continue
+            
+            current_load = len(track.stations)
+            if current_load != load:
+                heapq.heapreplace(heap, (current_load, slot, generation, track_id))
+                continue
+            return track
+        
+        # Fall back to a scan for tracks registered outside the builders
+        target_track = None
+        min_load = float('inf')
+        for track in self.tracks.values():
+            if track.track_type in [TrackType.MAIN, TrackType.BRANCH]:
+                load = len(track.stations)
+                if load < min_load:
+                    min_load = load
+                    target_track = track
+        return target_track
+    
     def insert_data_optimally(self, data: Any, preferred_line: str = None) -> str:
         """Insert data at optimal location"""
         # Metro logic: Add to least busy line
@@ -282,14 +834,7 @@ class SubwayNetwork:
         if preferred_line and preferred_line in self.tracks:
             target_track = self.tracks[preferred_line]
         else:
-            # Find least busy line
-            min_load = float('inf')
-            for track in self.tracks.values():
-                if track.track_type in [TrackType.MAIN, TrackType.BRANCH]:
-                    load = len(track.stations)
-                    if load < min_load:
-                        min_load = load
-                        target_track = track
+            target_track = self._least_busy_track()
         
         if not target_track:
             # Create first line
@@ -297,52 +842,99 @@ class SubwayNetwork:
         
         # Create new station
         station_id = f"{target_track.track_id}_auto_{len(target_track.stations)}"
-        new_station = SubwayStation(station_id, data)
-        new_station.line_colors.add(target_track.color)
+        new_station = self._new_station(station_id, data)
+        new_station.line_colors_mask |= _palette_bit(target_track.color)
+        
+        # Reopen a finalized track for appends
+        if isinstance(target_track.stations, tuple):
+            target_track.stations = list(target_track.stations)
+            target_track._station_ords = None
         
         # Add to end of line
         if target_track.stations:
             last_station = target_track.stations[-1]
-            last_station.next_stations[target_track.track_type] = new_station
-            new_station.prev_stations[target_track.track_type] = last_station
+            kind_idx = _TT_IDX[target_track.track_type]
+            self._link(last_station, new_station, kind_idx)
             
             # Update terminal status
-            if last_station.station_type == StationType.TERMINAL:
-                last_station.station_type = StationType.REGULAR
-            new_station.station_type = StationType.TERMINAL
+            if last_station._type_tag == ST_TERMINAL:
+                self._set_station_type(last_station, StationType.REGULAR)
+            self._set_station_type(new_station, StationType.TERMINAL)
         
         target_track.stations.append(new_station)
-        self.stations[station_id] = new_station
         self.total_data_items += 1
+        self._invalidate_routing()
         
         return station_id
     
+    def bulk_insert(self, data_items: List[Any], track_id: str = None) -> List[str]:
+        """Append many items to the end of one line in a single pass"""
+        data_items = list(data_items)
+        if not data_items:
+            return []
+        
+        if track_id and track_id in self.tracks:
+            target_track = self.tracks[track_id]
+        else:
+            target_track = self._least_busy_track()
+        
+        station_ids = []
+        if not target_track:
+            # Create first line, then keep appending to it
+            target_track = self.create_main_line("main_0", data_items[:1])
+            station_ids.append(target_track.stations[0].station_id)
+            data_items = data_items[1:]
+        
+        # Reopen a finalized track for appends
+        if isinstance(target_track.stations, tuple):
+            target_track.stations = list(target_track.stations)
+            target_track._station_ords = None
+        
+        track_stations = target_track.stations
+        kind_idx = _TT_IDX[target_track.track_type]
+        color_bit = _palette_bit(target_track.color)
+        old_tail = track_stations[-1] if track_stations else None
+        
+        new_stations = self._new_stations(f"{target_track.track_id}_auto_", len(track_stations),
+                                          data_items, color_bit)
+        chain = new_stations if old_tail is None else [old_tail] + new_stations
+        for prev_station, station in zip(chain, chain[1:]):
+            self._link(prev_station, station, kind_idx)
+        
+        track_stations.extend(new_stations)
+        station_ids.extend([station.station_id for station in new_stations])
+        
+        # Same terminal status as inserting one by one: only the new tail is a terminal
+        if new_stations:
+            if old_tail is not None and old_tail._type_tag == ST_TERMINAL:
+                self._set_station_type(old_tail, StationType.REGULAR)
+            if len(track_stations) > 1:
+                self._set_station_type(track_stations[-1], StationType.TERMINAL)
+        
+        self.total_data_items += len(data_items)
+        self._invalidate_routing()
+        
+        return station_ids
+    
     def get_network_statistics(self) -> Dict:
         """Network statistics - metro-like metrics"""
+        type_counts = self._type_counts  # Maintained incrementally, no rescan
         stats = {
             'total_stations': len(self.stations),
             'total_tracks': len(self.tracks),
             'total_data_items': self.total_data_items,
-            'junction_count': sum(1 for s in self.stations.values() 
-                                if s.station_type == StationType.JUNCTION),
-            'express_stations': sum(1 for s in self.stations.values() 
-                                  if s.station_type == StationType.EXPRESS),
-            'transfer_hubs': sum(1 for s in self.stations.values() 
-                               if s.station_type == StationType.TRANSFER),
-            'terminal_points': sum(1 for s in self.stations.values() 
-                                 if s.station_type == StationType.TERMINAL),
+            'junction_count': type_counts[ST_JUNCTION],
+            'express_stations': type_counts[ST_EXPRESS],
+            'transfer_hubs': type_counts[ST_TRANSFER],
+            'terminal_points': type_counts[ST_TERMINAL],
         }
         
         # Track type distribution
-        track_types = {}
-        for track in self.tracks.values():
-            track_types[track.track_type.value] = track_types.get(track.track_type.value, 0) + 1
-        stats['track_distribution'] = track_types
+        stats['track_distribution'] = {track_type: count for track_type, count
+                                       in self._track_type_counts.items() if count}
         
         # Average connectivity
-        total_connections = sum(len(s.next_stations) + len(s.prev_stations) + 
-                              len(s.branch_connections) + len(s.transfer_destinations)
-                              for s in self.stations.values())
+        total_connections = self._connection_total
         stats['avg_connectivity'] = total_connections / len(self.stations) if self.stations else 0
         
         return stats
@@ -354,23 +946,19 @@ class SubwayNetwork:
         for track_id, track in self.tracks.items():
             result.append(f"🚇 {track.track_type.value.upper()} LINE: {track_id} ({track.color})")
             
-            station_line = ""
+            # Same connector for every hop on a track
+            connection_type = "═══" if track.track_type == TrackType.EXPRESS else "───"
+            last_index = len(track.stations) - 1
+            
+            parts = []
             for i, station in enumerate(track.stations):
                 # Station symbol based on type
-                symbol = {
-                    StationType.TERMINAL: "🔚",
-                    StationType.JUNCTION: "🔀", 
-                    StationType.EXPRESS: "⚡",
-                    StationType.TRANSFER: "🔄",
-                    StationType.REGULAR: "🚉"
-                }[station.station_type]
-                
-                station_line += f"{symbol}{station.station_id}"
-                if i < len(track.stations) - 1:
-                    connection_type = "═══" if track.track_type == TrackType.EXPRESS else "───"
-                    station_line += f"{connection_type}"
+                parts.append(_STATION_SYMBOL[station._type_tag])
+                parts.append(station.station_id)
+                if i < last_index:
+                    parts.append(connection_type)
             
-            result.append(f"  {station_line}")
+            result.append("  " + "".join(parts))
             result.append("")
         
         return "\n".join(result)
@@ -402,11 +990,12 @@ def build_ankara_metro_network():
     network.add_transfer_connection("M1_Line_station_0", "M2_Branch_station_0")
     network.add_transfer_connection("M1_Line_station_5", "M3_Branch_station_0")
 
+    network.finalize()
     return network
 
 
-def benchmark_subway_vs_traditional():
-    """Subway Data Structure vs traditional structures"""
+def benchmark_subway_vs_traditional(seed: int = 0):
+    """Subway Data Structure vs traditional structures, with seeded route queries"""
     print("=== SUBWAY DATA STRUCTURE BENCHMARK ===")
     
     # Test data
@@ -439,32 +1028,32 @@ def benchmark_subway_vs_traditional():
         else:
             subway.insert_data_optimally(data)
     
+    subway.finalize()
     subway_build_time = time.time() - start_time
     
     # Traditional List
     start_time = time.time()
     traditional_list = []
     traditional_list.extend(test_data)
+    traditional_set = set(traditional_list)  # Hashed membership, like the subway's data index
     list_build_time = time.time() - start_time
     
+    # Same seeded query pairs for both sides, generated outside the timed sections
+    rng = random.Random(seed)
+    half = len(test_data) // 2
+    query_pairs = [(test_data[rng.randint(0, half)], test_data[rng.randint(half, len(test_data)-1)])
+                   for _ in range(100)]
+    
     # Route finding test
     start_time = time.time()
-    routes_found = 0
-    for i in range(100):
-        start_data = test_data[random.randint(0, len(test_data)//2)]
-        end_data = test_data[random.randint(len(test_data)//2, len(test_data)-1)]
-        route = subway.find_optimal_route(start_data, end_data)
-        if route:
-            routes_found += 1
+    routes_found = sum(1 for route in subway.find_routes_batch(query_pairs) if route)
     subway_route_time = time.time() - start_time
     
     # Traditional search
     start_time = time.time()
     searches_found = 0
-    for i in range(100):
-        start_data = test_data[random.randint(0, len(test_data)//2)]
-        end_data = test_data[random.randint(len(test_data)//2, len(test_data)-1)]
-        if start_data in traditional_list and end_data in traditional_list:
+    for start_data, end_data in query_pairs:
+        if start_data in traditional_set and end_data in traditional_set:
             searches_found += 1
     list_search_time = time.time() - start_time
     